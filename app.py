@@ -1,13 +1,28 @@
 import streamlit as st
 import pandas as pd
 from openpyxl import load_workbook, Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
 import os
 from datetime import datetime
 import re
 import io
-from difflib import SequenceMatcher
+import hashlib
+import math
+from rapidfuzz import process, fuzz
+
+# Customer content pattern: item_name x quantity, separated by , or ，
+_ITEM_RE = re.compile(r'(.*?)\s*x\s*(\d+)\s*(?:，|,|$)')
+# Leading / trailing separators trimmed off parsed item names: whitespace
+# (every Unicode space char is <= U+3000) plus , ， 。 ；
+_STRIP_CHARS = ',，。；' + ''.join(c for c in map(chr, range(0x3001)) if c.isspace())
+# Whitespace and punctuation ignored when normalizing product names. A '.' before a
+# digit is a decimal point and is kept (1.5L != 15L, .5L != 5L); a separator run
+# between digits (group 1) becomes one space so '2 5kg' doesn't turn into '25kg'
+_NORM_RE = re.compile(r'(?<=\d)([\s,，。()（）]+)(?=\d)|\.(?!\d)|[\s,，。()（）]+')
+# Total price line markers (simplified / traditional), one C-level scan per item
+_TOTAL_RE = re.compile(r'总价|總價')
 
 # Page configuration
 st.set_page_config(
@@ -20,255 +35,409 @@ st.title("Customer Price Manager")
 st.markdown("---")
 
 #styling
-try:
-    with open('style.css') as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
-except FileNotFoundError:
+@st.cache_data(show_spinner=False)
+def load_css(path='style.css'):
+    """Read the stylesheet once instead of on every rerun (None if the file is missing)"""
+    try:
+        with open(path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+css = load_css()
+if css is not None:
+    st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
+else:
     st.warning("CSS file not found - using default styling")
 
 
+# Customer fields, also kept column-wise (one tuple per field) for export
+CUSTOMER_FIELDS = ('seq', 'name', 'content', 'phone', 'address')
+
+def build_customers_soa(customers):
+    """Convert the customer list (one dict per customer) into parallel per-field tuples"""
+    return {field: tuple(c[field] for c in customers) for field in CUSTOMER_FIELDS}
+
 # Initialize session state
-if 'original_file_bytes' not in st.session_state:
-    st.session_state.original_file_bytes = None
+if 'original_file_hash' not in st.session_state:
+    st.session_state.original_file_hash = None
 if 'original_filename' not in st.session_state:
     st.session_state.original_filename = None
+if 'original_file_id' not in st.session_state:
+    st.session_state.original_file_id = None
 if 'customers' not in st.session_state:
     st.session_state.customers = []
 if 'products' not in st.session_state:
     st.session_state.products = {}
+if 'customers_soa' not in st.session_state:
+    st.session_state.customers_soa = build_customers_soa([])
+if 'customer_labels' not in st.session_state:
+    st.session_state.customer_labels = ()
 if 'customer_row_map' not in st.session_state:
     st.session_state.customer_row_map = {}
 if 'customer_edits' not in st.session_state:
     st.session_state.customer_edits = {}
+if 'base_prices' not in st.session_state:
+    st.session_state.base_prices = {}
+if 'product_prices' not in st.session_state:
+    st.session_state.product_prices = ()
+if 'product_names' not in st.session_state:
+    st.session_state.product_names = ()
+if 'product_token_index' not in st.session_state:
+    st.session_state.product_token_index = {}
+if 'product_length_index' not in st.session_state:
+    st.session_state.product_length_index = {}
+if 'product_norm_index' not in st.session_state:
+    st.session_state.product_norm_index = {}
+if 'product_options' not in st.session_state:
+    st.session_state.product_options = ("",)
+if 'customer_totals' not in st.session_state:
+    st.session_state.customer_totals = {}
+if 'price_cache' not in st.session_state:
+    st.session_state.price_cache = {}
+if 'parsed_items' not in st.session_state:
+    st.session_state.parsed_items = {}
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
 
-def similarity(a, b):
-    """Calculate string similarity ratio (0.0 to 1.0)"""
-    return SequenceMatcher(None, a, b).ratio()
+class SheetFormatError(Exception):
+    """The uploaded sheet is missing a section header row"""
+    def __init__(self, message, hint):
+        super().__init__(message)
+        self.message = message
+        self.hint = hint
 
-def find_customer_section_start(ws):
-    """Find the row where customer data starts (header row with 序号, 姓名, etc)"""
-    for row_idx in range(1, ws.max_row + 1):
-        cell1 = ws.cell(row_idx, 1).value
-        cell2 = ws.cell(row_idx, 2).value
-        
-        # Look for the header row: 序号, 姓名, 内容, etc
-        if cell1 and cell2:
-            if str(cell1).strip() == '序号' and str(cell2).strip() == '姓名':
-                return row_idx
-    return None
+# Section header pairs (first two cells of the header row) -> section they open
+SECTION_HEADERS = {
+    ('序号', '姓名'): 'customers',  # 序号, 姓名, 内容, 标签, 手机号码, 收货地址
+    ('商品', '单价'): 'products',   # 商品, 单价, 数量, 金额
+}
 
-def find_product_section_start(ws):
-    """Find the row where product data starts (header row with 商品, 单价, etc)"""
-    for row_idx in range(1, ws.max_row + 1):
-        cell1 = ws.cell(row_idx, 1).value
-        cell2 = ws.cell(row_idx, 2).value
-        
-        # Look for the header row: 商品, 单价, 数量, 金额
-        if cell1 and cell2:
-            if str(cell1).strip() == '商品' and str(cell2).strip() == '单价':
-                return row_idx
+def find_section_header(row):
+    """Return the section a header row opens ('customers' / 'products'), or None"""
+    cell1, cell2 = row[0], row[1]
+    if cell1 and cell2:
+        return SECTION_HEADERS.get((str(cell1).strip(), str(cell2).strip()))
     return None
 
+def to_price(value):
+    """Convert a price cell with float(); empty or unparseable values become 0.0"""
+    try:
+        return float(value) if value else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+# Consecutive empty rows that mark the end of the product list
+PRODUCT_END_EMPTY_ROWS = 10
+
+@st.cache_data(max_entries=4, show_spinner=False)
 def load_excel_data(file_bytes):
-    """Load Excel data from bytes - NO FILE SAVING"""
+    """Load Excel data from bytes - NO FILE SAVING
+    
+    Pure function (no st.* output) so identical uploads are served from cache.
+    Raises SheetFormatError when a section header row is missing.
+    """
+    # Read-only mode streams rows instead of building the full cell graph
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    ws = wb.active
+    # Read-only sheets trust the file's stored dimension, which some writers get
+    # wrong (e.g. "A1"); reset it so iter_rows reads every row that is present
+    ws.reset_dimensions()
+    
+    customers = []
+    customer_row_map = {}
+    product_names = []
+    product_prices = []
+    
+    # Single pass over row tuples:
+    # seek_customers -> customers -> seek_products -> products
+    state = 'seek_customers'
+    customer_header_row = None
+    empty_product_rows = 0
+    
     try:
-        # Load workbook from bytes
-        wb = load_workbook(io.BytesIO(file_bytes))
-        ws = wb.active
-        
-        # Find section headers
-        customer_header_row = find_customer_section_start(ws)
-        product_header_row = find_product_section_start(ws)
-        
-        if not customer_header_row:
-            st.error("❌ Cannot find customer list header row!")
-            st.info("Expected to find a row with '序号' and '姓名' columns")
-            return None, None, None
-        
-        if not product_header_row:
-            st.error("❌ Cannot find product list header row!")
-            st.info("Expected to find a row with '商品' and '单价' columns")
-            return None, None, None
-        
-        # Customer data starts after header
-        customer_data_start_row = customer_header_row + 1
-        
-        # Product data starts after header
-        product_data_start_row = product_header_row + 1
-        
-        # Extract customers
-        customers = []
-        customer_row_map = {}
-        row_idx = customer_data_start_row
-        
-        while row_idx < product_header_row:  # Stop before product section
-            seq_num = ws.cell(row_idx, 1).value
-            name = ws.cell(row_idx, 2).value
-            content = ws.cell(row_idx, 3).value
-            phone = ws.cell(row_idx, 5).value
-            address = ws.cell(row_idx, 6).value
-            
-            # Stop if we hit an empty sequence number or name
-            if seq_num is None or name is None:
-                break
-            
-            # Convert to strings and clean
-            name_str = str(name).strip()
-            content_str = str(content).strip() if content else ""
-            
-            customer_data = {
-                'seq': seq_num,
-                'name': name_str,
-                'content': content_str,
-                'phone': phone,
-                'address': address
-            }
-            
-            customers.append(customer_data)
-            customer_row_map[name_str] = customer_data
-            row_idx += 1
-        
-        # Extract products with prices
-        products = {}
-        row_idx = product_data_start_row
-        
-        while row_idx <= ws.max_row:
-            product_name = ws.cell(row_idx, 1).value
-            price = ws.cell(row_idx, 2).value
+        for row_idx, row in enumerate(ws.iter_rows(max_col=6, values_only=True), start=1):
+            # One header lookup per row covers both section markers
+            section = find_section_header(row)
             
-            if product_name is None or price is None:
-                # Check if we've hit the end (empty rows)
-                if row_idx > product_data_start_row + 100:  # Safety check
-                    break
-                row_idx += 1
+            if section == 'products' and state != 'products':
+                # Product header ends the customer section
+                state = 'products'
                 continue
             
-            try:
-                price_float = float(price) if price else 0.0
-            except (ValueError, TypeError):
-                price_float = 0.0
+            if state == 'seek_customers':
+                if section == 'customers':
+                    state = 'customers'
+                    customer_header_row = row_idx
             
-            product_name_str = str(product_name).strip()
-            
-            # Skip empty products
-            if product_name_str:
-                products[product_name_str] = {
-                    'price': price_float
+            elif state == 'customers':
+                seq_num, name, content, _, phone, address = row
+                
+                # Stop if we hit an empty sequence number or name
+                if seq_num is None or name is None:
+                    state = 'seek_products'
+                    continue
+                
+                # Convert to strings and clean
+                name_str = str(name).strip()
+                content_str = str(content).strip() if content else ""
+                
+                customer_data = {
+                    'seq': seq_num,
+                    'name': name_str,
+                    'content': content_str,
+                    'phone': phone,
+                    'address': address
                 }
+                
+                customers.append(customer_data)
+                customer_row_map[name_str] = customer_data
             
-            row_idx += 1
-        
-        return customers, products, customer_row_map
-        
-    except Exception as e:
-        st.error(f"❌ Error loading file: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())
-        return None, None, None
+            elif state == 'products':
+                product_name, price = row[0], row[1]
+                
+                # A run of empty name cells ends the product list; shorter gaps are skipped
+                if product_name is None:
+                    empty_product_rows += 1
+                    if empty_product_rows >= PRODUCT_END_EMPTY_ROWS:
+                        break
+                    continue
+                empty_product_rows = 0
+                
+                # Skip products without a price
+                if price is None:
+                    continue
+                
+                product_name_str = str(product_name).strip()
+                
+                # Skip empty products
+                if product_name_str:
+                    product_names.append(product_name_str)
+                    product_prices.append(price)
+    finally:
+        wb.close()
+    
+    # Normalize prices in one vectorized pass, then retry the values pandas could
+    # not parse with float() - it also accepts full-width digits like '１２.５'
+    raw_prices = pd.Series(product_prices, dtype=object)
+    prices = pd.to_numeric(raw_prices, errors='coerce')
+    unparsed = prices.isna()
+    if unparsed.any():
+        prices[unparsed] = raw_prices[unparsed].map(to_price)
+    prices = prices.fillna(0.0).astype(float)
+    products = {name: {'price': price} for name, price in zip(product_names, prices.tolist())}
+    
+    if customer_header_row is None:
+        raise SheetFormatError("Cannot find customer list header row!",
+                         "Expected to find a row with '序号' and '姓名' columns")
+    
+    if state != 'products':
+        raise SheetFormatError("Cannot find product list header row!",
+                         "Expected to find a row with '商品' and '单价' columns")
+    
+    return customers, products, customer_row_map
 
 def parse_customer_items(content_text):
     """Parse the customer's content field to extract items and quantities
     
     Looks for pattern: item_name x quantity
     Separators can be comma or Chinese comma（，）
+    Returns an immutable tuple of (item_name, qty) pairs so it can be memoized
     """
     if not content_text:
-        return []
+        return ()
     
     items = []
     
     # Pattern: Match text up to "x[digits]" followed by comma or end
     # This properly handles Chinese commas inside item names
-    pattern = r'(.*?)\s*x\s*(\d+)\s*(?:，|,|$)'
-    matches = re.finditer(pattern, content_text)
+    matches = _ITEM_RE.finditer(content_text)
     
     for match in matches:
-        item_name = match.group(1).strip()
         qty_str = match.group(2)
         
-        # Clean up the item name - remove only leading/trailing separators, not parentheses
-        # This preserves closing parentheses like ） at the end of product names
-        item_name = re.sub(r'^[\s,，。；]+', '', item_name)
-        item_name = re.sub(r'[\s,，。；]+$', '', item_name)
+        # Clean up the item name - remove only leading/trailing whitespace and separators,
+        # not parentheses. This preserves closing parentheses like ） at the end of product names
+        item_name = match.group(1).strip(_STRIP_CHARS)
         
         # Skip empty or invalid items
         if not item_name:
             continue
         
         # Skip if this is the total price line
-        if '总价' in item_name:  # ✅ CORRECT CHINESE!
+        if _TOTAL_RE.search(item_name):
             continue
         
         try:
             qty = int(qty_str)
-            items.append({'name': item_name, 'qty': qty})
+            items.append((item_name, qty))
         except ValueError:
             continue
     
-    return items
+    return tuple(items)
 
 def get_item_price(customer_name, item_name, fuzzy_threshold=0.70):
-    """Get the price for an item using EXACT matching first, then FUZZY matching."""
-    
-    # *** DEBUG: Show what we're looking for ***
-    #st.write(f"DEBUG: Looking for '{item_name}'")
-    #st.write(f"DEBUG: In products dict? {item_name in st.session_state.products}")
+    """Get the price for an item: the customer's custom price, else the product-list match.
     
+    Product-list matches only change on upload, so they are memoized in
+    st.session_state.price_cache (reset on every new file).
+    """
     # Check if there's a custom price for this customer and item
-    if customer_name in st.session_state.customer_edits:
-        if 'custom_prices' in st.session_state.customer_edits[customer_name]:
-            if item_name in st.session_state.customer_edits[customer_name]['custom_prices']:
-                return st.session_state.customer_edits[customer_name]['custom_prices'][item_name]
-    
-    # Try EXACT match in product list (fastest)
-    if item_name in st.session_state.products:
-        price = st.session_state.products[item_name]['price']
-        #st.write(f"DEBUG: EXACT MATCH found! Price: {price}")
-        return price
-    
-    st.write(f"DEBUG: No exact match, trying fuzzy...")
+    custom_prices = st.session_state.customer_edits.get(customer_name, {}).get('custom_prices')
+    if custom_prices and item_name in custom_prices:
+        return custom_prices[item_name]
+    
+    price_cache = st.session_state.price_cache
+    cache_key = (item_name, fuzzy_threshold)
+    price = price_cache.get(cache_key)
+    if price is None:
+        price = resolve_price(item_name, fuzzy_threshold)
+        price_cache[cache_key] = price
+    return price
+
+def resolve_price(item_name, fuzzy_threshold=0.70):
+    """Get the product-list price for an item using EXACT matching first, then FUZZY matching."""
+    # No st.* output here: this runs per item, and lookup details are shown
+    # by debug_item_lookup when debug mode is enabled in the sidebar
     
-    # Try FUZZY match to handle truncated text
-    best_match = None
-    best_score = 0
+    products = st.session_state.products
+    product_prices = st.session_state.product_prices
     
-    for product_name in st.session_state.products.keys():
-        score = similarity(item_name, product_name)
-        if score > best_score:
-            best_score = score
-            best_match = product_name
+    # Try EXACT match in product list (fastest)
+    product = products.get(item_name)
+    if product is not None:
+        return product['price']
+    
+    # Try NORMALIZED match - case, whitespace and punctuation ignored
+    normalized_match = st.session_state.product_norm_index.get(normalize_name(item_name))
+    if normalized_match is not None:
+        return products[normalized_match]['price']
+    
+    # Try FUZZY match to handle truncated text (RapidFuzz C++ scorer; score_cutoff
+    # lets it skip candidates that cannot reach the threshold)
+    positions, candidates = fuzzy_candidates(item_name, fuzzy_threshold)
+    match = process.extractOne(
+        item_name,
+        candidates,
+        scorer=fuzz.ratio,
+        score_cutoff=fuzzy_threshold * 100
+    )
     
-    # Return fuzzy match if above threshold
-    if best_score >= fuzzy_threshold and best_match:
-        return st.session_state.products[best_match]['price']
+    # Return fuzzy match if above threshold (match[2] indexes candidates)
+    if match:
+        return product_prices[positions[match[2]]]
     
     # Try keyword-based matching as last resort
-    item_words = set(item_name.split())
-    best_keyword_match = None
-    best_keyword_count = 0
-    
-    for product_name in st.session_state.products.keys():
-        product_words = set(product_name.split())
-        shared_words = item_words & product_words
-        
-        if len(shared_words) > best_keyword_count:
-            best_keyword_count = len(shared_words)
-            best_keyword_match = product_name
+    shared_counts = count_shared_words(item_name)
     
     # If we found a keyword match with at least 2 shared words, use it
-    if best_keyword_match and best_keyword_count >= 2:
-        return st.session_state.products[best_keyword_match]['price']
+    if shared_counts:
+        best_pos = best_shared_word_match(shared_counts)
+        if shared_counts[best_pos] >= 2:
+            return product_prices[best_pos]
     
     # Not found - return 0.0
     return 0.0
 
+def normalize_name(name):
+    """Normalize a product name for matching: drop whitespace and punctuation, lowercase
+    
+    Decimal points and the gaps between separate numbers are kept, so size
+    variants like 'Milk 1.5L' / 'Milk 15L' stay distinct.
+    """
+    return _NORM_RE.sub(lambda m: ' ' if m.group(1) else '', name).lower()
+
+def build_norm_index(product_names):
+    """Build a normalized name -> product name dict
+    
+    Only keys shared by exactly one product are kept. When two products
+    normalize alike, the key is dropped so those items go on to fuzzy
+    matching instead of silently getting one of the two prices.
+    """
+    norm_index = {}
+    ambiguous = set()
+    for product_name in product_names:
+        normalized = normalize_name(product_name)
+        # Names that are all punctuation would otherwise match any such item
+        if not normalized:
+            continue
+        if normalized in norm_index:
+            ambiguous.add(normalized)
+        else:
+            norm_index[normalized] = product_name
+    for normalized in ambiguous:
+        del norm_index[normalized]
+    return norm_index
+
+def build_length_index(product_names):
+    """Build a length index: name length -> positions (in product_names) of products that long"""
+    length_index = {}
+    for pos, product_name in enumerate(product_names):
+        length_index.setdefault(len(product_name), []).append(pos)
+    return length_index
+
+def fuzzy_candidates(item_name, fuzzy_threshold):
+    """Get (positions, names) of the products whose length can still reach the fuzzy threshold
+    
+    fuzz.ratio is 2*matches/(len_a+len_b), so a score >= t needs the product
+    length within [L*t/(2-t), L*(2-t)/t]; everything else is skipped with an
+    int compare. Product-list order is kept so ties resolve as before; the
+    index process.extractOne returns into names maps back through positions.
+    """
+    item_len = len(item_name)
+    lo = math.ceil(item_len * fuzzy_threshold / (2 - fuzzy_threshold) - 1e-9)
+    hi = math.floor(item_len * (2 - fuzzy_threshold) / fuzzy_threshold + 1e-9)
+    
+    length_index = st.session_state.product_length_index
+    positions = []
+    for length in range(lo, hi + 1):
+        positions.extend(length_index.get(length, ()))
+    positions.sort()
+    
+    product_names = st.session_state.product_names
+    return positions, [product_names[pos] for pos in positions]
+
+def build_token_index(product_names):
+    """Build an inverted index: word -> positions (in product_names) of products containing it"""
+    token_index = {}
+    for pos, product_name in enumerate(product_names):
+        for word in set(product_name.split()):
+            token_index.setdefault(word, []).append(pos)
+    return token_index
+
+def count_shared_words(item_name):
+    """Count words shared with the item, per product position
+    
+    Only products sharing at least one word are visited (via the token index).
+    """
+    token_index = st.session_state.product_token_index
+    shared_counts = {}
+    for word in set(item_name.split()):
+        for pos in token_index.get(word, ()):
+            shared_counts[pos] = shared_counts.get(pos, 0) + 1
+    return shared_counts
+
+def shared_word_rank(shared_counts):
+    """Sort key for product positions: most shared words first, earliest product on ties"""
+    return lambda pos: (-shared_counts[pos], pos)
+
+def best_shared_word_match(shared_counts):
+    """Get the top-ranked product position (one min() pass, no full sort)"""
+    return min(shared_counts, key=shared_word_rank(shared_counts))
+
+def rank_shared_words(shared_counts):
+    """Order product positions by shared word count, earliest product first on ties"""
+    return sorted(shared_counts, key=shared_word_rank(shared_counts))
+
 def debug_item_lookup(item_name):
     """Debug function to show why a price lookup fails."""
+    products = st.session_state.products
+    product_names = st.session_state.product_names
+    product_prices = st.session_state.product_prices
+    
     # Check exact match
-    if item_name in st.session_state.products:
-        price = st.session_state.products[item_name]['price']
+    if item_name in products:
+        price = products[item_name]['price']
         return {
             'found': True,
             'type': 'exact',
@@ -276,19 +445,31 @@ def debug_item_lookup(item_name):
             'message': f'✅ EXACT MATCH in product list: ${price:.2f}'
         }
     
-    # Try fuzzy match
-    best_match = None
-    best_score = 0
+    # Check normalized match
+    normalized_match = st.session_state.product_norm_index.get(normalize_name(item_name))
+    if normalized_match is not None:
+        price = products[normalized_match]['price']
+        return {
+            'found': True,
+            'type': 'normalized',
+            'price': price,
+            'matched_name': normalized_match,
+            'message': f'✅ NORMALIZED MATCH ({normalized_match}): ${price:.2f}'
+        }
     
-    for product_name in st.session_state.products.keys():
-        score = similarity(item_name, product_name)
-        if score > best_score:
-            best_score = score
-            best_match = product_name
+    # Try fuzzy match (70% threshold)
+    positions, candidates = fuzzy_candidates(item_name, 0.70)
+    match = process.extractOne(
+        item_name,
+        candidates,
+        scorer=fuzz.ratio,
+        score_cutoff=70
+    )
     
-    # Check if fuzzy match is good (70% threshold)
-    if best_score >= 0.70:
-        price = st.session_state.products[best_match]['price']
+    if match:
+        best_match, best_score, best_idx = match
+        best_score = best_score / 100
+        price = product_prices[positions[best_idx]]
         return {
             'found': True,
             'type': 'fuzzy',
@@ -298,22 +479,15 @@ def debug_item_lookup(item_name):
             'message': f'✅ FUZZY MATCH (similarity: {best_score:.1%}): ${price:.2f}'
         }
     
-    # Try keyword matching
-    item_words = set(item_name.split())
-    best_keyword_match = None
-    best_keyword_count = 0
-    
-    for product_name in st.session_state.products.keys():
-        product_words = set(product_name.split())
-        shared_words = item_words & product_words
-        
-        if len(shared_words) > best_keyword_count:
-            best_keyword_count = len(shared_words)
-            best_keyword_match = product_name
+    # Try keyword matching (products ranked by shared word count)
+    shared_counts = count_shared_words(item_name)
+    ranked = rank_shared_words(shared_counts)
     
     # Return keyword match if found
-    if best_keyword_match and best_keyword_count >= 2:
-        price = st.session_state.products[best_keyword_match]['price']
+    if ranked and shared_counts[ranked[0]] >= 2:
+        best_keyword_match = product_names[ranked[0]]
+        best_keyword_count = shared_counts[ranked[0]]
+        price = product_prices[ranked[0]]
         return {
             'found': True,
             'type': 'keyword',
@@ -323,25 +497,17 @@ def debug_item_lookup(item_name):
             'message': f'✅ KEYWORD MATCH ({best_keyword_count} shared words): ${price:.2f}'
         }
     
-    # Not found - find similar products
+    # Not found - list the products sharing at least one word, most similar first
     similar_products = []
     
-    item_words = set(item_name.split())
-    
-    for product_name in st.session_state.products.keys():
-        product_words = set(product_name.split())
-        shared_words = item_words & product_words
-        
-        if len(shared_words) >= 1:
-            similar_products.append({
-                'name': product_name,
-                'price': st.session_state.products[product_name]['price'],
-                'match_words': len(shared_words),
-                'total_words': len(product_words)
-            })
-    
-    # Sort by most similar
-    similar_products.sort(key=lambda x: x['match_words'], reverse=True)
+    for pos in ranked[:3]:
+        product_name = product_names[pos]
+        similar_products.append({
+            'name': product_name,
+            'price': product_prices[pos],
+            'match_words': shared_counts[pos],
+            'total_words': len(set(product_name.split()))
+        })
     
     return {
         'found': False,
@@ -352,14 +518,29 @@ def debug_item_lookup(item_name):
         'similar': similar_products[:3]
     }
 
+def get_price_map(customer_name):
+    """Get a flat {item_name: price} dict: product prices overlaid with the customer's custom prices
+    
+    Returns the shared base_prices dict itself when there are no custom prices - do not mutate.
+    """
+    custom_prices = st.session_state.customer_edits.get(customer_name, {}).get('custom_prices')
+    if not custom_prices:
+        return st.session_state.base_prices
+    return {**st.session_state.base_prices, **custom_prices}
+
+def lookup_price(price_map, customer_name, item_name):
+    """Get an item's price from a price map, falling back to fuzzy matching on a miss"""
+    price = price_map.get(item_name)
+    if price is None:
+        price = get_item_price(customer_name, item_name)
+    return price
+
 def calculate_total(items, customer_name=None):
     """Calculate total price for items"""
+    price_map = get_price_map(customer_name)
     total = 0.0
     for item in items:
-        item_name = item['name']
-        qty = item['qty']
-        price = get_item_price(customer_name, item_name)
-        total += price * qty
+        total += lookup_price(price_map, customer_name, item['name']) * item['qty']
     return total
 
 def get_current_items(customer_name):
@@ -369,10 +550,15 @@ def get_current_items(customer_name):
         if 'items' in st.session_state.customer_edits[customer_name]:
             return st.session_state.customer_edits[customer_name]['items']
     
-    # Otherwise parse from original content
+    # Otherwise parse from original content (memoized per content string,
+    # since the whole script - and any lru_cache in it - is re-run per interaction)
     if customer_name in st.session_state.customer_row_map:
         content = st.session_state.customer_row_map[customer_name]['content']
-        return parse_customer_items(content)
+        parsed = st.session_state.parsed_items.get(content)
+        if parsed is None:
+            parsed = parse_customer_items(content)
+            st.session_state.parsed_items[content] = parsed
+        return [{'name': name, 'qty': qty} for name, qty in parsed]
     
     return []
 
@@ -384,12 +570,71 @@ def save_customer_edits(customer_name, items, custom_prices):
     st.session_state.customer_edits[customer_name]['items'] = items
     st.session_state.customer_edits[customer_name]['custom_prices'] = custom_prices
     st.session_state.customer_edits[customer_name]['last_modified'] = datetime.now()
+    
+    # Only the edited customer's total changes; update it in place
+    st.session_state.customer_totals[customer_name] = calculate_total(items, customer_name)
 
-def create_export_excel():
-    """Create a clean, formatted Excel export with all customer data"""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Customer Orders"
+def get_customer_total(customer_name):
+    """Get a customer's order total from the session-state cache (filled on upload, updated on save)"""
+    totals = st.session_state.customer_totals
+    total = totals.get(customer_name)
+    if total is None:
+        total = totals[customer_name] = calculate_total(get_current_items(customer_name), customer_name)
+    return total
+
+def styled_row(ws, values, style):
+    """Wrap row values in write-only cells that reference a named style"""
+    cells = []
+    for value in values:
+        cell = WriteOnlyCell(ws, value=value)
+        # Applying the named style resets number_format, so keep the one the value
+        # picked up (e.g. dates) instead of letting it fall back to General
+        number_format = cell.number_format
+        cell.style = style
+        if number_format != 'General':
+            cell.number_format = number_format
+        cells.append(cell)
+    return cells
+
+def export_rows():
+    """Collect the export data rows: (seq, name, items detail, total, phone, address)
+    
+    Returned as a tuple of tuples so it can be hashed as the cache key of
+    build_export_workbook.
+    """
+    rows = []
+    
+    # Iterate the column-wise customer tuples
+    soa = st.session_state.customers_soa
+    for seq, customer_name, phone, address in zip(soa['seq'], soa['name'], soa['phone'], soa['address']):
+        # Get current items (edited or original)
+        items = get_current_items(customer_name)
+        
+        # Build items detail string and total in a single pass
+        price_map = get_price_map(customer_name)
+        total = 0.0
+        items_detail = []
+        for item in items:
+            price = lookup_price(price_map, customer_name, item['name'])
+            subtotal = price * item['qty']
+            total += subtotal
+            items_detail.append(f"{item['name']} x{item['qty']} (${subtotal:.2f})")
+        
+        items_text = '\n'.join(items_detail)
+        rows.append((seq, customer_name, items_text, f"${total:.2f}", phone, address))
+    
+    return tuple(rows)
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_export_workbook(rows):
+    """Build the formatted export workbook for the given rows and return its bytes
+    
+    Uses a write-only workbook: rows are streamed out as they are appended
+    instead of keeping a Cell object for every exported cell in memory.
+    Cached, so exporting again without any edits skips the openpyxl work.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Customer Orders")
     
     # Define styles
     header_font = Font(bold=True, size=12, color="FFFFFF")
@@ -404,6 +649,16 @@ def create_export_excel():
         bottom=Side(style='thin')
     )
     
+    # Register them once as named styles so each cell just references a style by name
+    wb.add_named_style(NamedStyle(
+        name="header",
+        font=header_font,
+        fill=header_fill,
+        alignment=header_alignment,
+        border=border
+    ))
+    wb.add_named_style(NamedStyle(name="data", alignment=cell_alignment, border=border))
+    
     # Set column widths
     ws.column_dimensions['A'].width = 8   # Seq
     ws.column_dimensions['B'].width = 15  # Name
@@ -412,161 +667,57 @@ def create_export_excel():
     ws.column_dimensions['E'].width = 15  # Phone
     ws.column_dimensions['F'].width = 30  # Address
     
+    # Freeze the header row (write-only sheets need this before the first append)
+    ws.freeze_panes = 'A2'
+    
     # Create header row
     headers = ['序号', '姓名', '商品内容及数量', '总金额', '手机号码', '收货地址']
-    for col_idx, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = border
-    
-    # Fill data rows
-    row_idx = 2
-    for customer in st.session_state.customers:
-        customer_name = customer['name']
-        
-        # Get current items (edited or original)
-        items = get_current_items(customer_name)
-        
-        # Build items detail string
-        items_detail = []
-        for item in items:
-            price = get_item_price(customer_name, item['name'])
-            subtotal = price * item['qty']
-            items_detail.append(f"{item['name']} x{item['qty']} (${subtotal:.2f})")
-        
-        items_text = '\n'.join(items_detail)
-        
-        # Calculate total
-        total = calculate_total(items, customer_name)
-        
-        # Write row
-        ws.cell(row=row_idx, column=1).value = customer['seq']
-        ws.cell(row=row_idx, column=2).value = customer_name
-        ws.cell(row=row_idx, column=3).value = items_text
-        ws.cell(row=row_idx, column=4).value = f"${total:.2f}"
-        ws.cell(row=row_idx, column=5).value = customer['phone']
-        ws.cell(row=row_idx, column=6).value = customer['address']
-        
-        # Apply formatting
-        for col_idx in range(1, 7):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.alignment = cell_alignment
-            cell.border = border
-        
-        row_idx += 1
+    ws.append(styled_row(ws, headers, "header"))
     
-    # Freeze the header row
-    ws.freeze_panes = 'A2'
+    # Write data rows
+    for row in rows:
+        ws.append(styled_row(ws, row, "data"))
     
-    # Save to bytes
+    # Save to an in-memory buffer; return plain bytes so the cached value is cheap to copy
     output = io.BytesIO()
     wb.save(output)
-    output.seek(0)
     return output.getvalue()
 
-# Sidebar for file upload
-st.sidebar.header("📁 File Upload")
-
-uploaded_file = st.sidebar.file_uploader(
-    "Choose Excel file",
-    type=['xlsx', 'xls'],
-    help="Upload your customer order Excel file"
-)
+def create_export_excel():
+    """Create a clean, formatted Excel export with all customer data (as bytes)"""
+    return build_export_workbook(export_rows())
 
-if uploaded_file is not None:
-    # Read file into bytes
-    file_bytes = uploaded_file.read()
+def summarize_item_edits(items_df, edited_df):
+    """Turn the item editor's output into (edited_items, custom_price_updates, subtotals, total)
     
-    # Only reload if it's a new file
-    if st.session_state.original_file_bytes != file_bytes:
-        with st.spinner("Loading Excel file..."):
-            customers, products, customer_row_map = load_excel_data(file_bytes)
-            
-            if customers and products:
-                st.session_state.original_file_bytes = file_bytes
-                st.session_state.original_filename = uploaded_file.name
-                st.session_state.customers = customers
-                st.session_state.products = products
-                st.session_state.customer_row_map = customer_row_map
-                st.session_state.data_loaded = True
-                st.session_state.customer_edits = {}  # Reset edits on new file
+    Vectorized over the whole table: deleted rows and rows with qty 0 are
+    dropped, and prices that differ from the starting price become custom prices.
+    subtotals has one entry per editor row, None for dropped rows.
+    """
+    prices = edited_df['price'].fillna(items_df['price'])
+    qtys = edited_df['qty'].fillna(0).astype(int)
+    keep = ~edited_df['delete'].fillna(False).astype(bool) & (qtys > 0)
+    
+    changed = (prices - items_df['price']).abs() > 0.001
+    custom_price_updates = dict(zip(items_df['name'][changed].tolist(), prices[changed].tolist()))
+    
+    edited_items = [
+        {'name': name, 'qty': qty}
+        for name, qty in zip(items_df['name'][keep].tolist(), qtys[keep].tolist())
+    ]
+    row_subtotals = prices * qtys
+    subtotals = [subtotal if kept else None for subtotal, kept in zip(row_subtotals.tolist(), keep.tolist())]
+    dynamic_total = float(row_subtotals[keep].sum())
+    
+    return edited_items, custom_price_updates, subtotals, dynamic_total
 
-# Main content
-if st.session_state.data_loaded:
-    
-    # Customer selection at top of sidebar (INSIDE data_loaded block)
-    st.sidebar.markdown("---")
-    st.sidebar.header("👤 Select Customer")
-    
-    customer_names = [f"{c['seq']}. {c['name']}" for c in st.session_state.customers]
-    selected_customer_idx_sidebar = st.sidebar.selectbox(
-        "Customer",
-        range(len(customer_names)),
-        format_func=lambda x: customer_names[x],
-        key="customer_selector"
-    )
-    
-    # Export button at the top
-    st.sidebar.markdown("---")
-    st.sidebar.header("📥 Export")
-    
-    export_button = st.sidebar.button("📄 Export Clean Excel", use_container_width=True, type="primary")
-    
-    if export_button:
-        with st.spinner("Creating export file..."):
-            export_bytes = create_export_excel()
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            export_filename = f"Customer_Orders_Export_{timestamp}.xlsx"
-            
-            st.sidebar.download_button(
-                label="⬇️ Download Export File",
-                data=export_bytes,
-                file_name=export_filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
-            st.sidebar.success("✅ Export ready! Click Download button above.")
-    
-    # Show stats
-    total_customers = len(st.session_state.customers)
-    edited_customers = len(st.session_state.customer_edits)
-    st.sidebar.info(f"👥 Total customers: {total_customers}\n✏️ Edited: {edited_customers}")
+@st.fragment
+def edit_order_form(customer_name, has_edits):
+    """Render the order editing form for one customer
     
-    # Get selected customer from sidebar selection
-    selected_customer = st.session_state.customers[selected_customer_idx_sidebar]
-    customer_name = selected_customer['name']
-    
-    # Check if customer has been edited
-    has_edits = customer_name in st.session_state.customer_edits
-    
-    # Grand Total
-    grand_total = 0.0
-    for customer in st.session_state.customers:
-        cust_name = customer['name']
-        items = get_current_items(cust_name)
-        customer_total = calculate_total(items, cust_name)
-        grand_total += customer_total
-        
-    #display grand total
-    st.markdown(f"<p style='font-size: 24px;'><strong>📊 Grand Total: ${grand_total:,.2f}</strong> </p>", unsafe_allow_html=True)
-    st.caption(f"{len(st.session_state.customers)} customers total")
-    st.markdown("---")
-    
-    # Display customer information
-    st.subheader("👤 Customer Information")
-    st.write(f"**Name:** {customer_name}" f",  **Phone:** {selected_customer['phone']}")
-    st.write(f"**Address:** {selected_customer['address']}")
-    if has_edits:
-        last_modified = st.session_state.customer_edits[customer_name].get('last_modified')
-        if last_modified:
-            st.info(f"✏️ Last edited: {last_modified.strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    st.markdown("---")
-    
-    # Edit items section
+    Runs as a fragment, so a widget interaction inside the form only reruns
+    this function instead of the whole script (upload, grand total, sidebar).
+    """
     st.subheader("✏️ Edit Order Items & Prices")
     
     # Get current items
@@ -580,78 +731,52 @@ if st.session_state.data_loaded:
     
     st.write("**Current Items:**")
     
-    # Column headers
-    col_headers = st.columns([3, 1.2, 1, 1.2, 1])
-    with col_headers[0]:
-        st.write("**Product**")
-    with col_headers[1]:
-        st.write("**Price ($/unit)**")
-    with col_headers[2]:
-        st.write("**Qty**")
-    with col_headers[3]:
-        st.write("**Subtotal**")
-    with col_headers[4]:
-        st.write("**Del**")
-    
-    edited_items = []
-    custom_price_updates = {}
+    # Display existing items with DYNAMIC PRICING - one data_editor for the
+    # whole table instead of 5 widgets per row
+    price_map = get_price_map(customer_name)
+    items_df = pd.DataFrame({
+        'name': [item['name'] for item in current_items],
+        'price': [lookup_price(price_map, customer_name, item['name']) for item in current_items],
+        'qty': [item['qty'] for item in current_items],
+        'delete': [False] * len(current_items)
+    }).astype({'price': float, 'qty': int, 'delete': bool})
+    
+    # Key on the last save so the editor starts fresh from newly saved items
+    last_modified = st.session_state.customer_edits.get(customer_name, {}).get('last_modified')
+    edited_df = st.data_editor(
+        items_df,
+        column_config={
+            'name': st.column_config.TextColumn("Product", disabled=True),
+            'price': st.column_config.NumberColumn("Price ($/unit)", min_value=0.0, step=0.01, format="%.2f"),
+            'qty': st.column_config.NumberColumn("Qty", min_value=0, step=1),
+            'delete': st.column_config.CheckboxColumn("Del")
+        },
+        hide_index=True,
+        num_rows="fixed",
+        key=f"items_editor_{customer_name}_{last_modified}"
+    )
     
-    # Display existing items with DYNAMIC PRICING
-    dynamic_total = 0.0
-    
-    for idx, item in enumerate(current_items):
-        # Use item name in key to make it unique per item (prevents inheritance bug)
-        item_key = f"{customer_name}_{item['name'].replace(' ', '_')}_{idx}"
-
-        col1, col2, col3, col4, col5 = st.columns([3, 1.2, 1, 1.2, 1])
-
-        # Check delete status first
-        delete = st.session_state.get(f"del_{item_key}", False)
-
-        with col1:
-            st.text(item['name'])
-        
-        with col2:
-            current_price = get_item_price(customer_name, item['name'])
-            
-            new_price = st.number_input(
-                f"Price###{idx}",
-                min_value=0.0,
-                value=float(current_price),
-                step=0.01,
-                format="%.2f",
-                key=f"price_{item_key}",
-                label_visibility="collapsed"
-            )
-            
-            if abs(new_price - current_price) > 0.001:
-                custom_price_updates[item['name']] = new_price
-        
-        with col3:
-            new_qty = st.number_input(
-                f"Qty###{idx}",
-                min_value=0,
-                value=item['qty'],
-                step=1,
-                key=f"qty_{item_key}",
-                label_visibility="collapsed"
-            )
-        
-        with col4:
-            if not delete and new_qty > 0:
-                price_to_use = new_price
-                subtotal = price_to_use * new_qty
-                st.text(f"${subtotal:.2f}")
-                dynamic_total += subtotal
-            else:
-                st.text("--")
-        
-        with col5:
-            st.checkbox("Del", key=f"del_{item_key}", label_visibility="collapsed")
-        
-        # Only add to edited_items if not deleted and quantity > 0
-        if not delete and new_qty > 0:
-            edited_items.append({'name': item['name'], 'qty': new_qty})
+    edited_items, custom_price_updates, subtotals, dynamic_total = summarize_item_edits(items_df, edited_df)
+    
+    # Per-row subtotals, recomputed from the editor on every edit
+    if subtotals:
+        st.dataframe(
+            pd.DataFrame({
+                'name': items_df['name'],
+                'subtotal': [f"${subtotal:.2f}" if subtotal is not None else "--" for subtotal in subtotals]
+            }),
+            column_config={
+                'name': st.column_config.TextColumn("Product"),
+                'subtotal': st.column_config.TextColumn("Subtotal")
+            },
+            hide_index=True
+        )
+    
+    # Price lookup details (debug mode only)
+    if st.session_state.get("debug_mode"):
+        with st.expander("🔍 Price Lookup Debug"):
+            for item in current_items:
+                st.write(f"**{item['name']}**: {debug_item_lookup(item['name'])['message']}")
     
     st.markdown("---")
 
@@ -663,7 +788,7 @@ if st.session_state.data_loaded:
         
         with searchBar:
             # Search/Select box - dynamically filters as you type
-            available_products = list(st.session_state.products.keys())
+            # (options are built once per upload: "" sentinel + product names)
         
             # Get current search term from session state to maintain filtering
             if 'search_filter' not in st.session_state:
@@ -671,7 +796,7 @@ if st.session_state.data_loaded:
             
             new_item = st.selectbox(
                 "Select Product",
-                [""] + available_products,
+                st.session_state.product_options,
                 key=f"new_item_select_{customer_name}",
             )
     
@@ -706,7 +831,7 @@ if st.session_state.data_loaded:
     with col_currentTotal:
         st.markdown("## 💵 Current Total:")
         st.markdown(f"<p class='current-total-amount'>${dynamic_total:,.2f}</p>", unsafe_allow_html=True)
-        st.metric("Total Items", len([item for item in edited_items if item['qty'] > 0]))
+        st.metric("Total Items", len(edited_items))  # only rows with qty > 0 are kept
         if has_edits:
             st.success("✅ Changes saved in memory")
 
@@ -740,6 +865,136 @@ if st.session_state.data_loaded:
             st.info("💡 Click 'Export Clean Excel' in sidebar when all edits are done")
             st.rerun()
 
+# Sidebar for file upload
+st.sidebar.header("📁 File Upload")
+
+uploaded_file = st.sidebar.file_uploader(
+    "Choose Excel file",
+    type=['xlsx', 'xls'],
+    help="Upload your customer order Excel file"
+)
+
+# The uploader hands back the same file_id on every rerun until a new file is
+# chosen, so skip reading and hashing entirely in that case
+if uploaded_file is not None and uploaded_file.file_id != st.session_state.original_file_id:
+    # Read file into bytes
+    file_bytes = uploaded_file.read()
+    file_hash = hashlib.blake2b(file_bytes, digest_size=16).digest()
+    
+    # Only reload if it's a new file (compare a 16-byte digest, not the whole file)
+    if st.session_state.original_file_hash != file_hash:
+        with st.spinner("Loading Excel file..."):
+            customers, products, customer_row_map = None, None, None
+            try:
+                customers, products, customer_row_map = load_excel_data(file_bytes)
+            except SheetFormatError as e:
+                st.error(f"❌ {e.message}")
+                st.info(e.hint)
+            except Exception as e:
+                st.error(f"❌ Error loading file: {str(e)}")
+                import traceback
+                st.error(traceback.format_exc())
+            
+            if customers and products:
+                st.session_state.original_file_hash = file_hash
+                st.session_state.original_file_id = uploaded_file.file_id
+                st.session_state.original_filename = uploaded_file.name
+                st.session_state.customers = customers
+                st.session_state.customers_soa = build_customers_soa(customers)
+                st.session_state.customer_labels = tuple(f"{c['seq']}. {c['name']}" for c in customers)
+                st.session_state.products = products
+                st.session_state.base_prices = {name: data['price'] for name, data in products.items()}
+                st.session_state.product_names = tuple(products.keys())
+                st.session_state.product_prices = tuple(st.session_state.base_prices.values())
+                st.session_state.product_token_index = build_token_index(st.session_state.product_names)
+                st.session_state.product_length_index = build_length_index(st.session_state.product_names)
+                st.session_state.product_norm_index = build_norm_index(st.session_state.product_names)
+                st.session_state.product_options = ("",) + st.session_state.product_names
+                st.session_state.customer_row_map = customer_row_map
+                st.session_state.data_loaded = True
+                st.session_state.customer_edits = {}  # Reset edits on new file
+                st.session_state.parsed_items = {}
+                st.session_state.price_cache = {}
+                st.session_state.customer_totals = {}
+                
+                # Compute every customer's total once, up front
+                for customer in customers:
+                    get_customer_total(customer['name'])
+    else:
+        # Same content re-uploaded - nothing to reload
+        st.session_state.original_file_id = uploaded_file.file_id
+
+# Main content
+if st.session_state.data_loaded:
+    
+    # Customer selection at top of sidebar (INSIDE data_loaded block)
+    st.sidebar.markdown("---")
+    st.sidebar.header("👤 Select Customer")
+    
+    customer_labels = st.session_state.customer_labels  # built once per upload
+    selected_customer_idx_sidebar = st.sidebar.selectbox(
+        "Customer",
+        range(len(customer_labels)),
+        format_func=lambda x: customer_labels[x],
+        key="customer_selector"
+    )
+    
+    # Export button at the top
+    st.sidebar.markdown("---")
+    st.sidebar.header("📥 Export")
+    
+    export_button = st.sidebar.button("📄 Export Clean Excel", use_container_width=True, type="primary")
+    
+    if export_button:
+        with st.spinner("Creating export file..."):
+            export_file = create_export_excel()
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_filename = f"Customer_Orders_Export_{timestamp}.xlsx"
+            
+            st.sidebar.download_button(
+                label="⬇️ Download Export File",
+                data=export_file,
+                file_name=export_filename,
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                use_container_width=True
+            )
+            st.sidebar.success("✅ Export ready! Click Download button above.")
+    
+    # Show stats
+    total_customers = len(st.session_state.customers)
+    edited_customers = len(st.session_state.customer_edits)
+    st.sidebar.info(f"👥 Total customers: {total_customers}\n✏️ Edited: {edited_customers}")
+    st.sidebar.checkbox("🔍 Debug price lookups", key="debug_mode")
+    
+    # Get selected customer from sidebar selection
+    selected_customer = st.session_state.customers[selected_customer_idx_sidebar]
+    customer_name = selected_customer['name']
+    
+    # Check if customer has been edited
+    has_edits = customer_name in st.session_state.customer_edits
+    
+    # Grand Total (sum of cached per-customer totals over the name column)
+    grand_total = sum(map(get_customer_total, st.session_state.customers_soa['name']))
+        
+    #display grand total
+    st.markdown(f"<p style='font-size: 24px;'><strong>📊 Grand Total: ${grand_total:,.2f}</strong> </p>", unsafe_allow_html=True)
+    st.caption(f"{len(st.session_state.customers)} customers total")
+    st.markdown("---")
+    
+    # Display customer information
+    st.subheader("👤 Customer Information")
+    st.write(f"**Name:** {customer_name}" f",  **Phone:** {selected_customer['phone']}")
+    st.write(f"**Address:** {selected_customer['address']}")
+    if has_edits:
+        last_modified = st.session_state.customer_edits[customer_name].get('last_modified')
+        if last_modified:
+            st.info(f"✏️ Last edited: {last_modified.strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    st.markdown("---")
+    
+    # Edit items section (fragment - widget changes only rerun the form)
+    edit_order_form(customer_name, has_edits)
+
 else:
     # Welcome screen
     st.info("📤 Please upload an Excel file to get started")
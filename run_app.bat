@@ -7,7 +7,7 @@ echo Starting Customer Price Manager...
 echo.
 
 REM Install packages if needed (first run only)
-python -m pip install -q streamlit pandas openpyxl 2>nul
+python -m pip install -q streamlit pandas openpyxl rapidfuzz 2>nul
 
 REM Run the app
 python -m streamlit run app.py